@@ -1,8 +1,154 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 import matplotlib.pyplot as plt
 import seaborn as sns
 import io
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+# Values of the 'Explicit' column that mark a song as explicit; anything else maps to 0.
+EXPLICIT_TRUE_VALUES = frozenset({'Yes', 'True'})
+
+# Rows converted to Arrow per batch when writing the cleaned CSV download.
+CSV_BATCH_ROWS = 65536
+
+# Columns a row must have values for to be kept.
+IMPORTANT_COLS = ['Popularity', 'Energy', 'Danceability', 'Positiveness', 'Speechiness',
+                  'Liveness', 'Acousticness', 'Instrumentalness', 'Tempo', 'Loudness (db)']
+
+@dataclass(frozen=True)
+class CleaningPlan:
+    """
+    Which important and optional columns a dataset schema provides.
+    """
+    has_explicit: bool
+    has_genre: bool
+    important_cols_present: tuple
+
+@st.cache_resource(show_spinner=False)
+def _make_plan(columns):
+    """
+    Builds the cleaning plan for a tuple of column names.
+    Cached per schema, so repeated uploads with the same columns reuse it.
+    """
+    return CleaningPlan(
+        has_explicit='Explicit' in columns,
+        has_genre='Genre' in columns,
+        important_cols_present=tuple(col for col in IMPORTANT_COLS if col in columns),
+    )
+
+@st.cache_data(show_spinner="Cleaning data...")
+def _clean(data):
+    """
+    Loads the raw CSV bytes and cleans them.
+    Returns the cleaned DataFrame, the cleaning summary messages and the cleaning plan.
+    Cached on the file contents, so reruns with the same upload skip this work.
+    """
+    # Arrow's multi-threaded reader, keeping the columns Arrow-backed
+    df = pd.read_csv(io.BytesIO(data), engine='pyarrow', dtype_backend='pyarrow')
+    summary = []
+    plan = _make_plan(tuple(df.columns))
+    missing_cols = [col for col in IMPORTANT_COLS if col not in plan.important_cols_present]
+    if missing_cols:
+        raise ValueError(f"The dataset is missing important columns: {', '.join(missing_cols)}")
+
+    # Drop rows with missing values in important columns and duplicate rows
+    # with a single combined mask, so the frame is only filtered once
+    complete = df[IMPORTANT_COLS].notna().all(axis=1)
+    duplicate = df.duplicated()
+    # float32 is plenty for plotting and correlation, and halves the bytes
+    # every later pass has to read ('Explicit' and 'Viral' are int8 below).
+    # 'Popularity' keeps its parsed dtype so the Viral threshold sees exact values.
+    # Downcast while taking the kept rows, and assign a fresh RangeIndex
+    # rather than reset_index(), so the frame is only copied once
+    downcast_cols = [col for col in IMPORTANT_COLS if col != 'Popularity']
+    df = df.loc[complete & ~duplicate].astype(dict.fromkeys(downcast_cols, np.float32))
+    df.index = pd.RangeIndex(len(df))
+    summary.append(f"Dropped {(~complete).sum()} rows with missing values in important columns.")
+    summary.append(f"Dropped {(complete & duplicate).sum()} duplicate rows.")
+
+    # Handle 'Explicit' column (convert Yes/No or True/False to binary)
+    if plan.has_explicit and pd.api.types.is_string_dtype(df['Explicit']):
+        df['Explicit'] = df['Explicit'].isin(EXPLICIT_TRUE_VALUES).to_numpy(dtype=bool).view(np.int8)
+        summary.append("Converted 'Explicit' column to binary (1 for explicit, 0 for non-explicit).")
+    elif plan.has_explicit:
+        summary.append("'Explicit' column is already numeric or not present.")
+    else:
+        summary.append("'Explicit' column not found.")
+
+    # Create 'Viral' label
+    # A song is considered 'viral' if its popularity is 80 or above.
+    # The boolean result is reinterpreted as int8 in place, without a second cast pass.
+    df['Viral'] = (df['Popularity'].to_numpy() >= 80).view(np.int8)
+    summary.append("Created 'Viral' label based on Popularity (>= 80).")
+
+    # Store 'Genre' as a categorical so each genre string is hashed once and
+    # counting genres works on the integer codes. Going through a string dtype
+    # first also handles an all-empty column, which Arrow reads as null-typed
+    if plan.has_genre:
+        df['Genre'] = df['Genre'].astype('string[pyarrow]').astype('category')
+
+    return df, summary, plan
+
+def _smoothed_density(values, value_range, bins=200, sigma=3):
+    """
+    Approximates a KDE with a density histogram smoothed by a Gaussian kernel.
+    A single O(N) pass, unlike a full KDE fit over every point.
+    Returns the bin centers and the smoothed density.
+    """
+    density, edges = np.histogram(values, bins=bins, range=value_range, density=True)
+    offsets = np.arange(-3 * sigma, 3 * sigma + 1)
+    kernel = np.exp(-0.5 * (offsets / sigma) ** 2)
+    kernel /= kernel.sum()
+    centers = (edges[:-1] + edges[1:]) / 2
+    return centers, np.convolve(density, kernel, mode='same')
+
+@st.cache_data(show_spinner=False)
+def _plot_feature_distributions(df, features):
+    """
+    Plots the distribution of each feature in viral vs non-viral songs
+    as a grid of subplots in a single figure.
+    """
+    ncols = 3
+    nrows = -(-len(features) // ncols)
+    fig, axes = plt.subplots(nrows, ncols, figsize=(8 * ncols, 4 * nrows), squeeze=False)
+    # Build the viral mask once and index the raw column arrays with it,
+    # rather than filtering the whole frame
+    viral = df['Viral'].to_numpy(dtype=bool)
+    non_viral = ~viral
+    groups = ((viral, 'Viral', 'green'), (non_viral, 'Non-Viral', 'red'))
+
+    def densities(col):
+        values = df[col].to_numpy()
+        # Only finite values can be binned; this also leaves empty columns blank
+        finite = np.isfinite(values)
+        if not finite.any():
+            return []
+        value_range = (values[finite].min(), values[finite].max())
+        return [(label, color, *_smoothed_density(values[mask & finite], value_range))
+                for mask, label, color in groups if (mask & finite).any()]
+
+    # The per-feature histograms are independent NumPy passes, so compute them
+    # in threads; drawing stays on this thread as Matplotlib is not thread-safe
+    with ThreadPoolExecutor() as pool:
+        feature_densities = list(pool.map(densities, features))
+
+    for col, ax, curves in zip(features, axes.flat, feature_densities):
+        for label, color, centers, density in curves:
+            ax.plot(centers, density, color=color, label=label)
+            ax.fill_between(centers, density, alpha=0.25, color=color, rasterized=True)
+        ax.set_title(f"{col} Distribution in Viral vs Non-Viral Songs")
+        ax.set_xlabel(col)
+        ax.set_ylabel("Density")
+        ax.legend()
+    for ax in axes.flat[len(features):]:
+        ax.set_visible(False)
+    fig.tight_layout()
+    plt.close(fig) # Detach from pyplot; the cached figure can still be rendered
+    return fig
 
 def run_analysis(uploaded_file):
     """
@@ -11,40 +157,15 @@ def run_analysis(uploaded_file):
     """
     if uploaded_file is not None:
         try:
-            # Load the dataset
-            df = pd.read_csv(uploaded_file)
+            # Load and clean the dataset
+            df, summary, plan = _clean(uploaded_file.getvalue())
         except Exception as e:
             st.error(f"Error loading file: {e}. Please ensure it's a valid CSV.")
             return
 
         st.subheader("1. Data Cleaning Summary")
-
-        # Drop duplicates
-        initial_rows = df.shape[0]
-        df.drop_duplicates(inplace=True)
-        st.write(f"Dropped {initial_rows - df.shape[0]} duplicate rows.")
-
-        # Drop rows with missing values in important columns
-        important_cols = ['Popularity', 'Energy', 'Danceability', 'Positiveness', 'Speechiness',
-                          'Liveness', 'Acousticness', 'Instrumentalness', 'Tempo', 'Loudness (db)']
-        initial_rows_after_duplicates = df.shape[0]
-        df.dropna(subset=important_cols, inplace=True)
-        st.write(f"Dropped {initial_rows_after_duplicates - df.shape[0]} rows with missing values in important columns.")
-
-        # Handle 'Explicit' column (convert Yes/No or True/False to binary)
-        if 'Explicit' in df.columns and df['Explicit'].dtype == object:
-            df['Explicit'] = df['Explicit'].map({'Yes': 1, 'No': 0, 'True': 1, 'False': 0}).fillna(0)
-            st.write("Converted 'Explicit' column to binary (1 for explicit, 0 for non-explicit).")
-        elif 'Explicit' in df.columns:
-            st.write("'Explicit' column is already numeric or not present.")
-        else:
-            st.write("'Explicit' column not found.")
-
-
-        # Create 'Viral' label
-        # A song is considered 'viral' if its popularity is 80 or above.
-        df['Viral'] = df['Popularity'].apply(lambda x: 1 if x >= 80 else 0)
-        st.write("Created 'Viral' label based on Popularity (>= 80).")
+        for message in summary:
+            st.write(message)
 
         st.success("Data Cleaning Complete!")
         st.write("Cleaned Data Head:")
@@ -56,27 +177,33 @@ def run_analysis(uploaded_file):
 
         # Compare feature distributions
         st.markdown("### Feature Distributions in Viral vs Non-Viral Songs")
-        for col in features:
-            fig, ax = plt.subplots(figsize=(8, 4))
-            sns.kdeplot(df[df['Viral'] == 1][col], label='Viral', fill=True, color='green', ax=ax)
-            sns.kdeplot(df[df['Viral'] == 0][col], label='Non-Viral', fill=True, color='red', ax=ax)
-            ax.set_title(f"{col} Distribution in Viral vs Non-Viral Songs")
-            ax.legend()
-            st.pyplot(fig)
-            plt.close(fig) # Close the figure to prevent display issues
+        st.pyplot(_plot_feature_distributions(df, features))
 
         # Correlation Heatmap
         st.markdown("### Correlation Heatmap")
         fig, ax = plt.subplots(figsize=(10, 8))
-        sns.heatmap(df[features + ['Viral']].corr(), annot=True, cmap='coolwarm', ax=ax)
+        corr_cols = features + ['Viral']
+        # NaNs are already dropped, so a plain float32 corrcoef matches DataFrame.corr().
+        # Copy each column straight into one row of a preallocated matrix, so
+        # corrcoef gets contiguous variables without an intermediate DataFrame
+        corr_values = np.empty((len(corr_cols), len(df)), dtype=np.float32)
+        for row, col in zip(corr_values, corr_cols):
+            row[:] = df[col].to_numpy()
+        corr = np.corrcoef(corr_values, dtype=np.float32)
+        # Format all annotations in one vectorized call instead of per cell
+        annot = np.char.mod('%.2f', corr)
+        sns.heatmap(corr, annot=annot, fmt='', cmap='coolwarm', xticklabels=corr_cols, yticklabels=corr_cols, ax=ax)
         ax.set_title("Correlation Heatmap")
         st.pyplot(fig)
         plt.close(fig)
 
         # Genre Analysis (Top genres among viral songs)
-        if 'Genre' in df.columns:
+        if plan.has_genre:
             st.markdown("### Top Genres in Viral Songs")
-            top_genres = df[df['Viral'] == 1]['Genre'].value_counts().head(10)
+            # Partial selection of the 10 largest counts instead of sorting every genre
+            top_genres = df.loc[df['Viral'] == 1, 'Genre'].value_counts(sort=False).nlargest(10)
+            # Categorical counts include genres with no viral songs
+            top_genres = top_genres[top_genres > 0]
             if not top_genres.empty:
                 fig, ax = plt.subplots(figsize=(10, 6))
                 top_genres.plot(kind='bar', color='purple', title='Top Genres in Viral Songs', ax=ax)
@@ -91,8 +218,15 @@ def run_analysis(uploaded_file):
             st.warning("'Genre' column not found in the dataset. Skipping genre analysis.")
 
         # Save cleaned data for download
-        csv_buffer = io.StringIO()
-        df.to_csv(csv_buffer, index=False)
+        # Arrow's CSV writer serializes column-wise in C, straight to bytes.
+        # Convert and write in row batches so only one batch is held in
+        # Arrow form at a time, instead of a full copy of the frame
+        csv_buffer = io.BytesIO()
+        schema = pa.Schema.from_pandas(df, preserve_index=False)
+        with pa_csv.CSVWriter(csv_buffer, schema) as writer:
+            for start in range(0, len(df), CSV_BATCH_ROWS):
+                batch = df.iloc[start:start + CSV_BATCH_ROWS]
+                writer.write_table(pa.Table.from_pandas(batch, schema=schema, preserve_index=False))
         st.download_button(
             label="Download Cleaned Data as CSV",
             data=csv_buffer.getvalue(),